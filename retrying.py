@@ -1,44 +1,63 @@
 # pylama:ignore=E701
 
+from asyncio import sleep as async_sleep
 from collections.abc import Sequence
+from copy import copy
 from dataclasses import dataclass, field, InitVar
 from datetime import datetime, timedelta
-from functools import wraps
 from itertools import count
 from inspect import iscoroutinefunction
 from random import Random
+from time import monotonic, sleep
 from typing import Any, Callable, Coroutine, List, Optional, Union
-import time
-import asyncio
+import sys
 
 RetryCallback = Callable[[Any, 'Context'], bool]
 DecisionHandler = Callable[[Any, Exception, 'Context'], bool]
 T = Union[Callable, Coroutine]
 
+_random = Random()
+
+# converts time.monotonic() values to wall clock timestamps
+_clock_offset = datetime.now().timestamp() - monotonic()
+
+# dataclasses handle slots since python 3.10
+_slots = {'slots': True} if sys.version_info >= (3, 10) else {}
+
 
 def retry(func: T = None, **opts) -> T:
     if func is None:
         return lambda f: retry(f, **opts)
 
     if iscoroutinefunction(func):
+        engine = AsyncRetry(func, **opts)
+
         async def wrapped(*args, **kwargs) -> Any:
-            z = AsyncRetry(func, **opts)
-            return (await z(*args, **kwargs))
+            return (await engine._run(args, kwargs))
     else:
+        engine = Retry(func, **opts)
+
         def wrapped(*args, **kwargs) -> Any:
-            return Retry(func, **opts)(*args, **kwargs)
+            return engine._run(args, kwargs)
 
-    return wraps(func)(wrapped)
+    for attr in ('__module__', '__name__', '__qualname__', '__doc__'):
+        try:
+            setattr(wrapped, attr, getattr(func, attr))
+        except AttributeError:
+            pass
+    wrapped.__wrapped__ = func
+    return wrapped
 
 
-@dataclass
-class Context(Sequence):
+@dataclass(**_slots)
+class Context:
     _attempts: List['Attempt'] = field(default_factory=list)
     backoff: 'Backoff' = None
-    timeout: Optional[datetime] = None
+    # deadline, on the time.monotonic() clock
+    timeout: Optional[float] = None
 
     def __iter__(self):
-        return iter(self.attempts)
+        return iter(self._attempts)
 
     def __getitem__(self, index):
         return self._attempts[index]
@@ -56,6 +75,9 @@ class Context(Sequence):
         return a
 
 
+Sequence.register(Context)
+
+
 def continue_callback(obj, ctx) -> True:
     return True
 
@@ -64,10 +86,14 @@ def stop_callback(obj, ctx) -> False:
     return False
 
 
-@dataclass(frozen=True)
 class Decision:
-    on_result: RetryCallback = field(default=stop_callback)
-    on_exception: RetryCallback = field(default=continue_callback)
+    __slots__ = ('on_result', 'on_exception')
+
+    def __init__(self,
+                 on_result: RetryCallback = stop_callback,
+                 on_exception: RetryCallback = continue_callback):
+        self.on_result = on_result
+        self.on_exception = on_exception
 
     def __call__(self, result, exception, ctx) -> bool:
         if exception is not None:
@@ -75,39 +101,71 @@ class Decision:
         return self.on_result(result, ctx)
 
 
-@dataclass
+def _default_decide(result, exception, ctx) -> bool:
+    return exception is not None
+
+
+def _decider(on_result: RetryCallback,
+             on_exception: RetryCallback) -> DecisionHandler:
+    if on_result is stop_callback and on_exception is continue_callback:
+        return _default_decide
+
+    def decide(result, exception, ctx) -> bool:
+        if exception is not None:
+            return on_exception(exception, ctx)
+        return on_result(result, ctx)
+    return decide
+
+
 class Retry:
-    func: Callable
-    on_result: InitVar[RetryCallback] = None
-    on_exception: InitVar[RetryCallback] = None
-    on_global: InitVar[DecisionHandler] = None
-    max_tries: Optional[int] = None
-    backoff: Optional['Backoff'] = None
-    giveup_after: Optional[timedelta] = None
-    wrap_exception: bool = False
-    reraise: bool = False
-
-    def __post_init__(self, on_result, on_exception, on_global):
-        self.backoff = self.backoff or Backoff(0)
-        assert not (on_global and on_result), 'global and result are unique together'
-        assert not (on_global and on_exception), 'global and exception are unique together'
-        self.decision = on_global or Decision(
+    __slots__ = ('func', 'max_tries', 'backoff', 'giveup_after',
+                 'wrap_exception', 'reraise', '_run', '_copy_backoff',
+                 '_giveup_after_s', '_decide')
+
+    def __init__(self,
+                 func: Callable,
+                 on_result: RetryCallback = None,
+                 on_exception: RetryCallback = None,
+                 on_global: DecisionHandler = None,
+                 max_tries: Optional[int] = None,
+                 backoff: Optional['Backoff'] = None,
+                 giveup_after: Optional[timedelta] = None,
+                 wrap_exception: bool = False,
+                 reraise: bool = False):
+        self.func = func
+        self.max_tries = max_tries
+        self.backoff = backoff or Backoff(0)
+        self.giveup_after = giveup_after
+        self.wrap_exception = wrap_exception
+        self.reraise = reraise
+        if max_tries is not None and max_tries < 1:
+            raise ValueError('max_tries must be at least 1')
+        # nothing can stop or slow down the loop, retry until success
+        forever = not (on_result or on_exception or on_global or backoff
+                       or max_tries is not None or giveup_after)
+        self._run = self._run_forever if forever else self._run_loop
+        self._copy_backoff = hasattr(self.backoff, 'reset')
+        self._giveup_after_s = None
+        if self.giveup_after:
+            self._giveup_after_s = self.giveup_after.total_seconds()
+        if on_global and on_result:
+            raise TypeError('global and result are unique together')
+        if on_global and on_exception:
+            raise TypeError('global and exception are unique together')
+        self._decide = on_global or _decider(
             on_result or stop_callback,
             on_exception or continue_callback
         )
 
-    def check_limits(self, i, ctx):
-        current_timeout = start = datetime.now()
-        current_timespan = None
-        if i and ctx.backoff:
-            current_timespan = next(ctx.backoff)
-            current_timeout += current_timespan
-        if i and ctx.timeout and ctx.timeout <= current_timeout:
+    def check_limits(self, ctx):
+        start = monotonic()
+        wait = _next_wait(ctx.backoff) if ctx.backoff else 0
+        deadline = ctx.timeout
+        if deadline is not None and start + wait >= deadline:
             self.throw(TimeoutError, 'timeout limit reached', ctx)
-        if i and current_timespan:
-            wait = current_timespan.total_seconds()
-            time.sleep(wait)
-            start = datetime.now()
+        if wait:
+            sleep(wait)
+            start = monotonic()
         return start
 
     def throw(self, cls, message, ctx):
@@ -129,72 +187,119 @@ class Retry:
         return result, error, try_again
 
     def __call__(self, *args, **kwargs):
-        def run():
-            start = datetime.now()
-            timeout = None
-            if self.giveup_after:
-                timeout = start + self.giveup_after
+        return self._run(args, kwargs)
+
+    def _run_forever(self, args, kwargs):
+        func = self.func
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                continue
+
+    def _run_loop(self, args, kwargs):
+        start = monotonic()
+        timeout = None
+        if self._giveup_after_s is not None:
+            timeout = start + self._giveup_after_s
+
+        # first attempt, most calls end here
+        transmit = self.transmit
+        result, error, try_again = transmit(*args, **kwargs)
+        decide = self._safe_decide
+        # the default decision does not read the context, which is only
+        # built once a retry is needed
+        ctx = None
+        if self._decide is not _default_decide:
+            ctx = Context(backoff=self.backoff, timeout=timeout)
+        if not (try_again or decide(result, error, ctx)):
+            return self.conclude(result, error, start, ctx)
+        if ctx is None:
             ctx = Context(backoff=self.backoff, timeout=timeout)
-            for i in count():
-                if i == self.max_tries:
-                    self.throw(MaxRetriesError, 'max tries limit reached', ctx)
-
-                start = self.check_limits(i, ctx)
-
-                try:
-                    result, error, try_again = self.transmit(*args, **kwargs)
-                    try:
-                        if try_again or self.decision(result, error, ctx):
-                            continue
-                    except Exception as exc:
-                        msg = 'Decision raised: %s' % exc
-                        raise RuntimeError(msg, result, error) from exc
-                    else:
-                        if error:
-                            if self.wrap_exception:
-                                raise RetryError(str(error), ctx) from error
-                            raise error
-                        else:
-                            return result
-
-                finally:
-                    ctx.add_attempts(exception=error, result=result, time=start)
-        return run()
-
-
-@dataclass
+        if self._copy_backoff and ctx.backoff is self.backoff:
+            # the configured backoff is never advanced, each call walks
+            # its own progression
+            ctx.backoff = copy(ctx.backoff)
+        add_attempts = ctx.add_attempts
+        add_attempts(exception=error, result=result, timestamp=start)
+        check_limits = self.check_limits
+
+        retries = count() if self.max_tries is None else range(self.max_tries - 1)
+        for _ in retries:
+            start = check_limits(ctx)
+            result, error, try_again = transmit(*args, **kwargs)
+            if not (try_again or decide(result, error, ctx)):
+                return self.conclude(result, error, start, ctx)
+            add_attempts(exception=error, result=result, timestamp=start)
+        self.throw(MaxRetriesError, 'max tries limit reached', ctx)
+
+    def _safe_decide(self, result, error, ctx) -> bool:
+        try:
+            return self._decide(result, error, ctx)
+        except Exception as exc:
+            msg = 'Decision raised: %s' % exc
+            raise RuntimeError(msg, result, error) from exc
+
+    def conclude(self, result, error, start, ctx):
+        if error:
+            ctx.add_attempts(exception=error, result=result, timestamp=start)
+            if self.wrap_exception:
+                raise RetryError(str(error), ctx) from error
+            raise error
+        return result
+
+
 class AsyncRetry:
-    coro: Callable
-    on_result: InitVar[RetryCallback] = None
-    on_exception: InitVar[RetryCallback] = None
-    on_global: InitVar[DecisionHandler] = None
-    max_tries: Optional[int] = None
-    backoff: Optional['Backoff'] = None
-    giveup_after: Optional[timedelta] = None
-    wrap_exception: bool = False
-    reraise: bool = False
-
-    def __post_init__(self, on_result, on_exception, on_global):
-        self.backoff = self.backoff or Backoff(0)
-        assert not (on_global and on_result), 'global and result are unique together'
-        assert not (on_global and on_exception), 'global and exception are unique together'
-        self.decision = on_global or Decision(
+    __slots__ = ('coro', 'max_tries', 'backoff', 'giveup_after',
+                 'wrap_exception', 'reraise', '_run', '_copy_backoff',
+                 '_giveup_after_s', '_decide')
+
+    def __init__(self,
+                 coro: Callable,
+                 on_result: RetryCallback = None,
+                 on_exception: RetryCallback = None,
+                 on_global: DecisionHandler = None,
+                 max_tries: Optional[int] = None,
+                 backoff: Optional['Backoff'] = None,
+                 giveup_after: Optional[timedelta] = None,
+                 wrap_exception: bool = False,
+                 reraise: bool = False):
+        self.coro = coro
+        self.max_tries = max_tries
+        self.backoff = backoff or Backoff(0)
+        self.giveup_after = giveup_after
+        self.wrap_exception = wrap_exception
+        self.reraise = reraise
+        if max_tries is not None and max_tries < 1:
+            raise ValueError('max_tries must be at least 1')
+        # nothing can stop or slow down the loop, retry until success
+        forever = not (on_result or on_exception or on_global or backoff
+                       or max_tries is not None or giveup_after)
+        self._run = self._run_forever if forever else self._run_loop
+        self._copy_backoff = hasattr(self.backoff, 'reset')
+        self._giveup_after_s = None
+        if self.giveup_after:
+            self._giveup_after_s = self.giveup_after.total_seconds()
+        if on_global and on_result:
+            raise TypeError('global and result are unique together')
+        if on_global and on_exception:
+            raise TypeError('global and exception are unique together')
+        if iscoroutinefunction(getattr(type(self.backoff), '__next__', None)):
+            raise TypeError('backoff must yield intervals, not wait for them')
+        self._decide = on_global or _decider(
             on_result or stop_callback,
             on_exception or continue_callback
         )
 
-    async def check_limits(self, i, ctx):
-        current_timeout = start = datetime.now()
-        current_timespan = None
-        if i and ctx.backoff:
-            current_timespan = next(ctx.backoff)
-            current_timeout += current_timespan
-        if i and ctx.timeout and ctx.timeout <= current_timeout:
+    async def check_limits(self, ctx):
+        start = monotonic()
+        wait = _next_wait(ctx.backoff) if ctx.backoff else 0
+        deadline = ctx.timeout
+        if deadline is not None and start + wait >= deadline:
             self.throw(TimeoutError, 'timeout limit reached', ctx)
-        if i and current_timespan:
-            wait = current_timespan.total_seconds()
-            await asyncio.sleep(wait)
-            start = datetime.now()
+        if wait:
+            await async_sleep(wait)
+            start = monotonic()
         return start
 
     def throw(self, cls, message, ctx):
@@ -216,44 +321,94 @@ class AsyncRetry:
         return result, error, try_again
 
     def __call__(self, *args, **kwargs):
-        async def run():
-            start = datetime.now()
-            timeout = None
-            if self.giveup_after:
-                timeout = start + self.giveup_after
+        return self._run(args, kwargs)
+
+    async def _run_forever(self, args, kwargs):
+        coro = self.coro
+        while True:
+            try:
+                return (await coro(*args, **kwargs))
+            except Exception:
+                continue
+
+    async def _run_loop(self, args, kwargs):
+        start = monotonic()
+        timeout = None
+        if self._giveup_after_s is not None:
+            timeout = start + self._giveup_after_s
+
+        # first attempt, most calls end here
+        transmit = self.transmit
+        result, error, try_again = await transmit(*args, **kwargs)
+        decide = self._safe_decide
+        # the default decision does not read the context, which is only
+        # built once a retry is needed
+        ctx = None
+        if self._decide is not _default_decide:
             ctx = Context(backoff=self.backoff, timeout=timeout)
-            for i in count():
-                if i == self.max_tries:
-                    self.throw(MaxRetriesError, 'max tries limit reached', ctx)
-
-                start = await self.check_limits(i, ctx)
-
-                try:
-                    result, error, try_again = await self.transmit(*args, **kwargs)
-                    try:
-                        if try_again or self.decision(result, error, ctx):
-                            continue
-                    except Exception as exc:
-                        msg = 'Decision raised: %s' % exc
-                        raise RuntimeError(msg, result, error) from exc
-                    else:
-                        if error:
-                            if self.wrap_exception:
-                                raise RetryError(str(error), ctx) from error
-                            raise error
-                        else:
-                            return result
-
-                finally:
-                    ctx.add_attempts(exception=error, result=result, time=start)
-        return run()
+        if not (try_again or decide(result, error, ctx)):
+            return self.conclude(result, error, start, ctx)
+        if ctx is None:
+            ctx = Context(backoff=self.backoff, timeout=timeout)
+        if self._copy_backoff and ctx.backoff is self.backoff:
+            # the configured backoff is never advanced, each call walks
+            # its own progression
+            ctx.backoff = copy(ctx.backoff)
+        add_attempts = ctx.add_attempts
+        add_attempts(exception=error, result=result, timestamp=start)
+        check_limits = self.check_limits
+
+        retries = count() if self.max_tries is None else range(self.max_tries - 1)
+        for _ in retries:
+            start = await check_limits(ctx)
+            result, error, try_again = await transmit(*args, **kwargs)
+            if not (try_again or decide(result, error, ctx)):
+                return self.conclude(result, error, start, ctx)
+            add_attempts(exception=error, result=result, timestamp=start)
+        self.throw(MaxRetriesError, 'max tries limit reached', ctx)
+
+    def _safe_decide(self, result, error, ctx) -> bool:
+        try:
+            return self._decide(result, error, ctx)
+        except Exception as exc:
+            msg = 'Decision raised: %s' % exc
+            raise RuntimeError(msg, result, error) from exc
+
+    def conclude(self, result, error, start, ctx):
+        if error:
+            ctx.add_attempts(exception=error, result=result, timestamp=start)
+            if self.wrap_exception:
+                raise RetryError(str(error), ctx) from error
+            raise error
+        return result
 
 
-@dataclass(frozen=True)
 class Attempt:
-    result: Any
-    exception: Optional[Exception]
-    time: datetime
+    __slots__ = ('result', 'exception', 'timestamp')
+
+    def __init__(self,
+                 result: Any,
+                 exception: Optional[Exception],
+                 timestamp: Optional[float] = None,
+                 *,
+                 time: Optional[datetime] = None):
+        if isinstance(timestamp, datetime):
+            timestamp, time = None, timestamp
+        if timestamp is None:
+            if time is None:
+                raise TypeError('timestamp or time is required')
+            timestamp = time.timestamp() - _clock_offset
+        self.result = result
+        self.exception = exception
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return 'Attempt(result=%r, exception=%r, timestamp=%r)' % (
+            self.result, self.exception, self.timestamp)
+
+    @property
+    def time(self) -> datetime:
+        return datetime.fromtimestamp(self.timestamp + _clock_offset)
 
 
 @dataclass(frozen=True)
@@ -272,72 +427,188 @@ class MaxRetriesError(RetryError):
     pass
 
 
-@dataclass
+@dataclass(**_slots)
 class RandBackoff:
     min: timedelta
     max: timedelta
+    seed: Optional[int] = None
+    random: Random = field(init=False, repr=False, compare=False)
+    _interval_s: Optional[float] = field(init=False, repr=False, compare=False)
 
     def __post_init__(self):
-        self.interval = None
-        self.random = Random(time.monotonic() * 1000_000_000)
+        self._interval_s = None
+        self.random = _random if self.seed is None else Random(self.seed)
+
+    @property
+    def interval(self) -> Optional[timedelta]:
+        if self._interval_s is not None:
+            return timedelta(seconds=self._interval_s)
+
+    @interval.setter
+    def interval(self, value: Optional[timedelta]):
+        self._interval_s = value.total_seconds() if value is not None else None
 
     def __next__(self):
-        self.interval = self.get_interval()
-        return self.interval
+        interval = self.get_interval()
+        self._interval_s = interval.total_seconds()
+        return interval
+
+    def _next_seconds(self) -> float:
+        self._interval_s = self._get_interval_s()
+        return self._interval_s
 
     def get_interval(self) -> timedelta:
+        return timedelta(seconds=self._get_interval_s())
+
+    def _get_interval_s(self) -> float:
         salt = self.random.random()
-        return self.min + (salt * (self.max - self.min))
+        min_s = self.min.total_seconds()
+        return min_s + (salt * (self.max.total_seconds() - min_s))
 
 
-@dataclass
+@dataclass(**_slots)
 class Backoff:
+    """Yields the interval to wait between two attempts.
+
+    ``__next__`` must return immediately and never sleep by itself: waiting
+    is up to the caller, so that AsyncRetry never blocks the event loop.
+    """
+
     seconds: InitVar[int] = 0
     milliseconds: InitVar[int] = 0
     microseconds: InitVar[int] = 0
+    _interval_s: Optional[float] = field(init=False, repr=False, compare=False)
 
     def __post_init__(self, seconds, milliseconds, microseconds):
-        self.interval = timedelta(seconds=seconds,
-                                  milliseconds=milliseconds,
-                                  microseconds=microseconds)
+        self._interval_s = timedelta(seconds=seconds,
+                                     milliseconds=milliseconds,
+                                     microseconds=microseconds).total_seconds()
+
+    @property
+    def interval(self) -> Optional[timedelta]:
+        if self._interval_s is not None:
+            return timedelta(seconds=self._interval_s)
+
+    @interval.setter
+    def interval(self, value: Optional[timedelta]):
+        self._interval_s = value.total_seconds() if value is not None else None
 
     def __next__(self):
         return self.interval
 
+    def _next_seconds(self) -> float:
+        return self._interval_s
+
 
-@dataclass
+@dataclass(**_slots)
 class ExponentialBackoff(Backoff):
     max: timedelta = field(default=timedelta(seconds=60))
     randomization_factor: float = 0.5
     multiplier: float = 1.5
+    seed: Optional[int] = None
+    initial: timedelta = field(init=False, repr=False, compare=False)
+    random: Random = field(init=False, repr=False, compare=False)
+    _current_s: float = field(init=False, repr=False, compare=False)
 
     def __post_init__(self, seconds, milliseconds, microseconds):
-        self.interval = None
+        self._interval_s = None
         self.initial = timedelta(seconds=seconds,
                                  milliseconds=milliseconds,
                                  microseconds=microseconds)
-        self.random = Random(time.monotonic() * 1000_000_000)
+        self.random = _random if self.seed is None else Random(self.seed)
         self.reset()
 
+    @property
+    def current(self) -> timedelta:
+        return timedelta(seconds=self._current_s)
+
+    @current.setter
+    def current(self, value: timedelta):
+        self._current_s = value.total_seconds()
+
     def reset(self):
-        self.current = self.initial
+        self._current_s = self.initial.total_seconds()
 
     def __next__(self):
-        self.interval = self.get_interval()
+        interval = self.get_interval()
+        self._interval_s = interval.total_seconds()
         self.increment()
-        return self.interval
+        return interval
+
+    def _next_seconds(self) -> float:
+        self._interval_s = self._get_interval_s()
+        self.increment()
+        return self._interval_s
 
     def increment(self):
-        self.current = min(self.max, self.current * self.multiplier)
         # ensure at least 100 milliseconds
-        self.current = max(self.current, timedelta(seconds=.1))
+        self._current_s = max(.1, min(self.max.total_seconds(),
+                                      self._current_s * self.multiplier))
 
     def get_interval(self) -> timedelta:
+        return timedelta(seconds=self._get_interval_s())
+
+    def _get_interval_s(self) -> float:
         salt = self.random.random()
-        delta = self.randomization_factor * self.current
-        min_interval = self.current - delta
-        max = self.current + delta
-        return min_interval + (salt * (max - min_interval))
+        delta = self.randomization_factor * self._current_s
+        min_interval = self._current_s - delta
+        max_interval = self._current_s + delta
+        return min_interval + (salt * (max_interval - min_interval))
+
+
+@dataclass(**_slots)
+class FullJitterBackoff:
+    """Waits a random interval between zero and an exponential ceiling.
+
+    Retries of concurrent clients spread over the whole window instead of
+    firing together, which mitigates thundering herds.
+    """
+
+    base: timedelta
+    cap: timedelta = field(default=timedelta(seconds=60))
+    seed: Optional[int] = None
+    random: Random = field(init=False, repr=False, compare=False)
+    _interval_s: Optional[float] = field(init=False, repr=False, compare=False)
+    _attempt: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._interval_s = None
+        self.random = _random if self.seed is None else Random(self.seed)
+        self.reset()
+
+    @property
+    def interval(self) -> Optional[timedelta]:
+        if self._interval_s is not None:
+            return timedelta(seconds=self._interval_s)
+
+    @interval.setter
+    def interval(self, value: Optional[timedelta]):
+        self._interval_s = value.total_seconds() if value is not None else None
+
+    def reset(self):
+        self._attempt = 0
+
+    def __next__(self):
+        return timedelta(seconds=self._next_seconds())
+
+    def _next_seconds(self) -> float:
+        cap_s = self.cap.total_seconds()
+        ceiling = min(cap_s, self.base.total_seconds() * (1 << self._attempt))
+        # stop growing once the ceiling is stuck at zero or at the cap
+        if 0 < ceiling < cap_s:
+            self._attempt += 1
+        self._interval_s = self.random.uniform(0, ceiling)
+        return self._interval_s
+
+
+# _next_seconds() skips the public methods, subclasses may override them
+_FLOAT_BACKOFFS = {RandBackoff, Backoff, ExponentialBackoff, FullJitterBackoff}
+
+
+def _next_wait(backoff) -> float:
+    if type(backoff) in _FLOAT_BACKOFFS:
+        return backoff._next_seconds()
+    return next(backoff).total_seconds()
 
 
 class TryAgain(Exception):
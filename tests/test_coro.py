@@ -1,6 +1,9 @@
+import asyncio
 import pytest
+import time
 from itertools import cycle
-from retrying import retry, Backoff, ExponentialBackoff, RandBackoff
+from retrying import retry, AsyncRetry, Backoff, ExponentialBackoff, RandBackoff
+from retrying import FullJitterBackoff
 from retrying import RetryError, MaxRetriesError, TimeoutError, TryAgain
 from unittest.mock import Mock
 from datetime import timedelta
@@ -33,6 +36,9 @@ async def test_inherits_docs():
         """Docstring"""
     assert example.__name__ == 'example'
     assert example.__doc__ == 'Docstring'
+    assert example.__qualname__.endswith('.example')
+    assert example.__module__ == __name__
+    assert example.__wrapped__.__name__ == 'example'
 
 
 @pytest.mark.asyncio
@@ -139,6 +145,13 @@ async def test_rand_backoff(mock):
     assert mock.call_count == 3
 
 
+@pytest.mark.asyncio
+async def test_full_jitter_backoff(mock):
+    mock.side_effect = cycle(['dumb', 'exception', 'foo'])
+    await retry(coro, backoff=FullJitterBackoff(timedelta(milliseconds=1)))(mock)
+    assert mock.call_count == 3
+
+
 @pytest.mark.asyncio
 async def test_custom_backoff(mock):
     mock.side_effect = cycle(['dumb', 'exception', 'foo'])
@@ -237,3 +250,52 @@ async def test_try_again_max_retries(mock):
     mock.side_effect = cycle(['again'])
     with pytest.raises(MaxRetriesError):
         await retry(coro, max_tries=4)(mock)
+
+
+@pytest.mark.asyncio
+async def test_backoff_does_not_block_loop():
+    n = 500
+    started = time.monotonic()
+    results = await asyncio.gather(*[
+        retry(coro, backoff=Backoff(.01))(Mock(side_effect=['dumb', 'ok']))
+        for _ in range(n)
+    ])
+    assert results == ['ok'] * n
+    assert time.monotonic() - started < n * .01 / 2
+
+
+def test_reject_waiting_backoff():
+    class WaitingBackoff:
+        async def __next__(self):
+            await asyncio.sleep(.01)
+            return timedelta(seconds=.01)
+
+    with pytest.raises(TypeError):
+        AsyncRetry(coro, backoff=WaitingBackoff())
+
+
+@pytest.mark.asyncio
+async def test_try_again_until_success(mock):
+    mock.side_effect = ['again', 'dumb', 'again', 'ok']
+    assert (await retry(coro)(mock)) == 'ok'
+    assert mock.call_count == 4
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_have_own_backoff():
+    currents = {}
+
+    def callback(result, ctx):
+        currents.setdefault(id(ctx), []).append(ctx.backoff.current)
+        return result == 'foo'
+
+    backoff = ExponentialBackoff(milliseconds=1, randomization_factor=0)
+    wrapped = retry(coro, on_result=callback, backoff=backoff)
+    await asyncio.gather(
+        wrapped(Mock(side_effect=['foo', 'foo', 'foo', 'bar'])),
+        wrapped(Mock(side_effect=['foo', 'foo', 'bar'])),
+    )
+    expected = [timedelta(milliseconds=1), timedelta(milliseconds=100),
+                timedelta(milliseconds=150), timedelta(milliseconds=225)]
+    assert sorted(currents.values()) == [expected[:3], expected]
+    assert backoff.current == timedelta(milliseconds=1)
@@ -1,9 +1,16 @@
 import pytest
+import retrying
+import sys
+import time
+from collections.abc import Sequence
+from functools import partial
 from itertools import cycle
 from retrying import retry, Backoff, ExponentialBackoff, RandBackoff
+from retrying import FullJitterBackoff, Attempt
+from retrying import continue_callback, stop_callback
 from retrying import RetryError, MaxRetriesError, TimeoutError, TryAgain
 from unittest.mock import Mock
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 
 class Dumb(Exception):
@@ -32,6 +39,16 @@ def test_inherits_docs():
         """Docstring"""
     assert example.__name__ == 'example'
     assert example.__doc__ == 'Docstring'
+    assert example.__qualname__.endswith('.example')
+    assert example.__module__ == __name__
+    assert example.__wrapped__.__name__ == 'example'
+
+
+def test_wraps_partial(mock):
+    wrapped = retry(partial(func, mock))
+    mock.side_effect = ['dumb', 'ok']
+    assert wrapped() == 'ok'
+    assert wrapped.__name__ == 'wrapped'
 
 
 def test_retry_until_success(mock):
@@ -71,6 +88,19 @@ def test_wrap_expection(mock):
     assert mock.call_count == 2
 
 
+def test_wrap_expection_context(mock):
+    def callback(error, ctx):
+        return not isinstance(error, Dumb)
+
+    mock.side_effect = ['exception', 'dumb']
+    with pytest.raises(RetryError) as excinfo:
+        retry(func, on_exception=callback, wrap_exception=True)(mock)
+    ctx = excinfo.value.context
+    assert isinstance(ctx, Sequence)
+    assert ctx.tries == 2
+    assert isinstance(ctx[-1].exception, Dumb)
+
+
 def test_on_result(mock):
     sentinel = 'bar'
 
@@ -93,6 +123,16 @@ def test_on_global(mock):
     assert mock.call_count == 3
 
 
+def test_on_global_excludes_other_callbacks():
+    def callback(*args):
+        return False
+
+    with pytest.raises(TypeError):
+        retry(func, on_global=callback, on_result=callback)
+    with pytest.raises(TypeError):
+        retry(func, on_global=callback, on_exception=callback)
+
+
 def test_on_global_caused_runtime_error(mock):
     def callback(result, exception, ctx):
         raise Exception('No reason')
@@ -109,6 +149,29 @@ def test_max_tries(mock):
     assert mock.call_count == 4
 
 
+def test_max_tries_context(mock):
+    mock.side_effect = cycle(['dumb'])
+    with pytest.raises(MaxRetriesError) as excinfo:
+        retry(func, max_tries=2)(mock)
+    assert excinfo.value.context.tries == 2
+
+
+def test_max_tries_with_default_callbacks(mock):
+    mock.side_effect = cycle(['dumb', 'exception', 'foo'])
+    assert retry(func, max_tries=4, on_result=stop_callback,
+                 on_exception=continue_callback)(mock) == 'foo'
+    assert mock.call_count == 3
+
+
+def test_max_tries_at_least_one(mock):
+    with pytest.raises(ValueError):
+        retry(func, max_tries=0)
+    mock.side_effect = ['dumb', 'ok']
+    with pytest.raises(MaxRetriesError):
+        retry(func, max_tries=1)(mock)
+    assert mock.call_count == 1
+
+
 def test_backoff(mock):
     mock.side_effect = cycle(['dumb', 'exception', 'foo'])
     retry(func, backoff=Backoff(.001))(mock)
@@ -128,6 +191,144 @@ def test_rand_backoff(mock):
     assert mock.call_count == 3
 
 
+def test_backoff_intervals():
+    backoff = ExponentialBackoff(1, max=timedelta(seconds=2),
+                                 randomization_factor=0)
+    assert backoff.interval is None
+    assert next(backoff) == timedelta(seconds=1)
+    assert next(backoff) == timedelta(seconds=1.5)
+    assert next(backoff) == timedelta(seconds=2)
+    assert backoff.interval == timedelta(seconds=2)
+    backoff.reset()
+    assert backoff.current == timedelta(seconds=1)
+
+    backoff = RandBackoff(timedelta(seconds=1), timedelta(seconds=2))
+    assert timedelta(seconds=1) <= next(backoff) <= timedelta(seconds=2)
+    assert next(Backoff(.5)) == timedelta(seconds=.5)
+
+
+def test_reset_backoff_between_calls(mock):
+    currents = []
+
+    def callback(result, ctx):
+        currents.append(ctx.backoff.current)
+        return result == 'foo'
+
+    backoff = ExponentialBackoff(milliseconds=1)
+    wrapped = retry(func, on_result=callback, backoff=backoff)
+    mock.side_effect = cycle(['foo', 'bar'])
+    assert wrapped(mock) == 'bar'
+    assert wrapped(mock) == 'bar'
+    assert currents[0] == currents[2] == timedelta(milliseconds=1)
+    assert currents[1] > currents[0]
+
+
+def test_full_jitter_intervals():
+    backoff = FullJitterBackoff(timedelta(seconds=1), cap=timedelta(seconds=3))
+    for ceiling in 1, 2, 3, 3:
+        assert timedelta(0) <= next(backoff) <= timedelta(seconds=ceiling)
+
+    backoff = FullJitterBackoff(timedelta(0))
+    assert [next(backoff) for _ in range(2000)][-1] == timedelta(0)
+
+
+def test_backoff_waits(mock, monkeypatch):
+    waits = []
+    monkeypatch.setattr(retrying, 'sleep', waits.append)
+    backoff = ExponentialBackoff(1, randomization_factor=0)
+    mock.side_effect = cycle(['dumb', 'exception', 'foo'])
+    assert retry(func, max_tries=1000, backoff=backoff)(mock) == 'foo'
+    assert waits == [1, 1.5]
+
+
+def test_backoff_subclasses(mock, monkeypatch):
+    class Fixed(Backoff):
+        def __next__(self):
+            return timedelta(seconds=3)
+
+    class Capped(ExponentialBackoff):
+        def get_interval(self):
+            return timedelta(seconds=7)
+
+    waits = []
+    monkeypatch.setattr(retrying, 'sleep', waits.append)
+    mock.side_effect = cycle(['dumb', 'exception', 'foo'])
+    retry(func, backoff=Fixed())(mock)
+    retry(func, backoff=Capped(1))(mock)
+    assert waits == [3, 3, 7, 7]
+
+
+def test_change_backoff_fields_on_context(mock, monkeypatch):
+    def callback(result, ctx):
+        ctx.backoff.max = timedelta(seconds=.5)
+        return result == 'foo'
+
+    waits = []
+    monkeypatch.setattr(retrying, 'sleep', waits.append)
+    backoff = ExponentialBackoff(1, randomization_factor=0)
+    mock.side_effect = ['foo', 'foo', 'bar']
+    assert retry(func, on_result=callback, backoff=backoff)(mock) == 'bar'
+    assert waits == [1, .5]
+
+
+def test_change_backoff_state_on_context(mock, monkeypatch):
+    def change_interval(result, ctx):
+        ctx.backoff.interval = timedelta(seconds=2)
+        return result == 'foo'
+
+    def change_current(result, ctx):
+        ctx.backoff.current = timedelta(seconds=5)
+        return result == 'foo'
+
+    waits = []
+    monkeypatch.setattr(retrying, 'sleep', waits.append)
+    mock.side_effect = cycle(['foo', 'bar'])
+    retry(func, on_result=change_interval, backoff=Backoff(1))(mock)
+    backoff = ExponentialBackoff(1, randomization_factor=0)
+    retry(func, on_result=change_current, backoff=backoff)(mock)
+    assert waits == [2, 5]
+
+
+def test_seeded_backoffs():
+    def intervals(backoff):
+        return [next(backoff) for _ in range(5)]
+
+    assert intervals(ExponentialBackoff(1, seed=42)) \
+        == intervals(ExponentialBackoff(1, seed=42))
+    bounds = timedelta(seconds=1), timedelta(seconds=2)
+    assert intervals(RandBackoff(*bounds, seed=42)) \
+        == intervals(RandBackoff(*bounds, seed=42))
+
+
+@pytest.mark.skipif(sys.version_info < (3, 10), reason='requires slots')
+def test_backoffs_have_slots():
+    bounds = timedelta(seconds=1), timedelta(seconds=2)
+    backoffs = (Backoff(1), ExponentialBackoff(1), RandBackoff(*bounds),
+                FullJitterBackoff(bounds[0]))
+    for backoff in backoffs:
+        assert not hasattr(backoff, '__dict__')
+
+
+def test_full_jitter_backoff(mock):
+    mock.side_effect = cycle(['dumb', 'exception', 'foo'])
+    retry(func, backoff=FullJitterBackoff(timedelta(milliseconds=1)))(mock)
+    assert mock.call_count == 3
+
+
+def test_copy_backoff_only_to_retry(mock):
+    backoffs = []
+
+    def callback(result, ctx):
+        backoffs.append(ctx.backoff)
+        return result == 'foo'
+
+    backoff = ExponentialBackoff(milliseconds=1)
+    mock.side_effect = ['foo', 'bar']
+    assert retry(func, on_result=callback, backoff=backoff)(mock) == 'bar'
+    assert backoffs[0] is backoff
+    assert backoffs[1] is not backoff
+
+
 def test_custom_backoff(mock):
     mock.side_effect = cycle(['dumb', 'exception', 'foo'])
     retry(func, backoff=cycle([timedelta(seconds=.001)]))(mock)
@@ -154,6 +355,25 @@ def test_change_backoff_on_context(mock):
     assert mock.call_count == 2
 
 
+def test_attempts_time(mock):
+    def callback(result, ctx):
+        for attempt in ctx:
+            assert isinstance(attempt.time, datetime)
+            assert attempt.time <= datetime.now()
+        return result != 'bar'
+
+    mock.side_effect = ['foo', 'foo', 'bar']
+    assert retry(func, on_result=callback)(mock) == 'bar'
+
+
+def test_attempt_time():
+    now = datetime.now()
+    attempt = Attempt('foo', None, time=now)
+    assert attempt.time == attempt.time
+    assert abs(attempt.time - now) < timedelta(milliseconds=1)
+    assert Attempt('foo', None, now).time == attempt.time
+
+
 def test_timeout(mock):
     def callback(result, ctx):
         return True
@@ -212,7 +432,24 @@ def test_try_again_timeout(mock):
               backoff=Backoff(seconds=1))(mock)
 
 
+def test_timeout_before_waiting(mock):
+    mock.side_effect = cycle(['dumb'])
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        retry(func,
+              giveup_after=timedelta(seconds=5),
+              backoff=Backoff(seconds=10))(mock)
+    assert time.monotonic() - started < 5
+    assert mock.call_count == 1
+
+
 def test_try_again_max_retries(mock):
     mock.side_effect = cycle(['again'])
     with pytest.raises(MaxRetriesError):
         retry(func, max_tries=4)(mock)
+
+
+def test_try_again_until_success(mock):
+    mock.side_effect = ['again', 'dumb', 'again', 'ok']
+    assert retry(func)(mock) == 'ok'
+    assert mock.call_count == 4